@@ -5,7 +5,7 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
@@ -21,13 +21,40 @@ db = None
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
-if database_url and database_name:
-    _client = MongoClient(database_url)
-    db = _client[database_name]
+
+def connect():
+    """Create the Motor client; call from the app's startup so it binds to the running loop"""
+    global _client, db
+    if database_url and database_name:
+        _client = AsyncIOMotorClient(
+            database_url,
+            maxPoolSize=100,
+            minPoolSize=10,
+            waitQueueTimeoutMS=2000,
+            serverSelectionTimeoutMS=2000,
+            compressors="zstd,zlib",
+            tz_aware=True,
+        )
+        db = _client[database_name]
+    return db
+
+
+def close():
+    """Close the Motor client on shutdown"""
+    global _client, db
+    if _client is not None:
+        _client.close()
+    _client = None
+    db = None
+
+def utc_now() -> datetime:
+    """Current UTC time at the millisecond precision BSON stores, so echoed and re-read values match"""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp and return it, including its new _id"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
@@ -37,19 +64,16 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     else:
         data_dict = data.copy()
 
-    data_dict['created_at'] = datetime.now(timezone.utc)
-    data_dict['updated_at'] = datetime.now(timezone.utc)
+    data_dict['created_at'] = data_dict['updated_at'] = utc_now()
 
-    result = db[collection_name].insert_one(data_dict)
-    return str(result.inserted_id)
+    # insert_one sets data_dict["_id"], so the stored document can be echoed without a re-read
+    await db[collection_name].insert_one(data_dict)
+    return data_dict
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
     cursor = db[collection_name].find(filter_dict or {})
-    if limit:
-        cursor = cursor.limit(limit)
-    
-    return list(cursor)
+    return await cursor.to_list(length=limit)
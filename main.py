@@ -1,18 +1,79 @@
 import os
+import multiprocessing
+import re
+import asyncio
 import hashlib
-from datetime import datetime
-from typing import List, Optional
-
-from fastapi import FastAPI, HTTPException
+import hmac
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from typing import Annotated, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, EmailStr, Field
+import orjson
 from bson import ObjectId
+from cachetools import TTLCache
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHash, VerificationError
+
+import database
+from database import create_document, utc_now
+from schemas import User as UserSchema, Worker as WorkerSchema, Booking as BookingSchema, ServiceType, BookingStatus
+
+
+def orjson_default(obj):
+    if isinstance(obj, ObjectId):
+        return obj.binary.hex()
+    raise TypeError
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """orjson response that also encodes raw ObjectIds"""
 
-from database import db, create_document, get_documents
-from schemas import User as UserSchema, Worker as WorkerSchema, Booking as BookingSchema
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=orjson_default)
 
 
-app = FastAPI(title="Emergency Home Services API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not SESSION_SECRET:
+        raise RuntimeError("SESSION_SECRET must be set (and shared by all workers) to sign login tokens")
+    # Split the cores between uvicorn workers; each one runs this lifespan and owns a pool.
+    # forkserver keeps the pool from forking after Motor has started its background threads.
+    web_workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    hash_workers = int(os.getenv("HASH_WORKERS", max(1, (os.cpu_count() or 1) // web_workers)))
+    app.state.hash_pool = ProcessPoolExecutor(
+        max_workers=hash_workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+    try:
+        database.connect()
+        # Independent startup work; seeded workers already carry location_lc. The dummy hash
+        # starts one pool process so the first login doesn't pay the spawn cost, and login
+        # verifies against it for unknown emails.
+        _, _, app.state.dummy_password_hash = await asyncio.gather(
+            ensure_indexes(),
+            seed_workers_if_empty(),
+            run_in_hash_pool(hash_password, secrets.token_hex(16)),
+        )
+        yield
+    finally:
+        app.state.hash_pool.shutdown()
+        database.close()
+
+
+app = FastAPI(
+    title="Emergency Home Services API",
+    lifespan=lifespan,
+    default_response_class=MongoJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +82,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 
 # --------- Auth Models ---------
@@ -38,96 +100,192 @@ class LoginRequest(BaseModel):
 
 
 # --------- Helpers ---------
+password_hasher = PasswordHasher()  # Argon2id with library defaults
+# Shared by every worker process so any of them can verify a token another issued
+SESSION_SECRET = os.getenv("SESSION_SECRET", "").encode("utf-8")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 24 * 60 * 60))
+
+
 def hash_password(pw: str) -> str:
-    return hashlib.sha256(pw.encode("utf-8")).hexdigest()
+    return password_hasher.hash(pw)
+
+
+def verify_password(stored: str, pw: str) -> bool:
+    if not stored.startswith("$argon2"):
+        # Accounts created before Argon2 hold an unsalted SHA-256 hex digest
+        legacy = hashlib.sha256(pw.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(stored, legacy)
+    try:
+        return password_hasher.verify(stored, pw)
+    except (VerificationError, InvalidHash):
+        return False
+
+
+def needs_rehash(stored: str) -> bool:
+    return not stored.startswith("$argon2") or password_hasher.check_needs_rehash(stored)
+
+
+async def run_in_hash_pool(fn, *args):
+    """Run CPU-bound password hashing in the process pool, off the event loop and the GIL"""
+    return await asyncio.get_running_loop().run_in_executor(app.state.hash_pool, fn, *args)
+
+
+def sign_session(payload: str) -> str:
+    return hmac.new(SESSION_SECRET, payload.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check using weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def issue_session(user_id: ObjectId) -> str:
+    """Stateless token "<user_id>.<expires_at>.<hmac>"; nothing is stored server-side"""
+    expires_at = int(datetime.now(timezone.utc).timestamp()) + SESSION_TTL_SECONDS
+    payload = f"{user_id}.{expires_at}"
+    return f"{payload}.{sign_session(payload)}"
+
+
+def verify_session(token: str) -> Optional[ObjectId]:
+    """Return the token's user id if its signature is valid and it has not expired"""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    user_id, expires_at, signature = parts
+    # Compare bytes: compare_digest raises TypeError on non-ASCII str input
+    expected = sign_session(f"{user_id}.{expires_at}")
+    if not hmac.compare_digest(signature.encode("utf-8"), expected.encode("ascii")):
+        return None
+    if not expires_at.isdigit() or int(expires_at) < datetime.now(timezone.utc).timestamp():
+        return None
+    return ObjectId(user_id) if ObjectId.is_valid(user_id) else None
 
 
 def to_public_id(doc):
     if not doc:
         return doc
-    doc["id"] = str(doc.pop("_id"))
+    # ObjectId is left as-is; orjson_default hex-encodes it when the response is rendered
+    doc["id"] = doc.pop("_id")
     return doc
 
 
-# --------- Startup seed ---------
-@app.on_event("startup")
-def seed_workers_if_empty():
-    if db is None:
+# --------- Startup indexes & seed ---------
+# Andhra Pradesh focused worker set across cities and services; trusted static data,
+# so it is inserted as-is without building WorkerSchema models
+AP_WORKER_SEED = (
+    # Visakhapatnam
+    {"name": "Srinivas Reddy", "service_type": "plumber", "location": "Visakhapatnam", "availability": ["09:00-11:00", "15:00-17:00"], "rating": 4.8, "experience_years": 9, "bio": "Leak repair, bathroom fitting, water purifier plumbing"},
+    {"name": "Kalyan Kumar", "service_type": "electrician", "location": "Visakhapatnam", "availability": ["10:00-12:00", "16:00-18:00"], "rating": 4.7, "experience_years": 7, "bio": "Wiring, MCB, inverter & fan installations"},
+    {"name": "Suresh Yadav", "service_type": "ac", "location": "Visakhapatnam", "availability": ["11:00-13:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "AC servicing, gas refill, installation"},
+    # Vijayawada
+    {"name": "Ravi Teja", "service_type": "plumber", "location": "Vijayawada", "availability": ["08:00-10:00", "14:00-16:00"], "rating": 4.5, "experience_years": 5, "bio": "Kitchen sink, pipeline & overhead tank solutions"},
+    {"name": "Imran Shaik", "service_type": "electrician", "location": "Vijayawada", "availability": ["09:00-11:00", "17:00-19:00"], "rating": 4.7, "experience_years": 8, "bio": "Short-circuit fix, appliance wiring, geyser fix"},
+    {"name": "Pradeep Varma", "service_type": "gas", "location": "Vijayawada", "availability": ["12:00-14:00", "19:00-21:00"], "rating": 4.6, "experience_years": 6, "bio": "Gas stove service, pipeline checks, regulator"},
+    # Guntur
+    {"name": "Arun K", "service_type": "plumber", "location": "Guntur", "availability": ["10:00-12:00", "16:00-18:00"], "rating": 4.4, "experience_years": 4, "bio": "Shower, tap & flush repairs"},
+    {"name": "Rahul Dev", "service_type": "electrician", "location": "Guntur", "availability": ["09:00-11:00", "13:00-15:00"], "rating": 4.5, "experience_years": 6, "bio": "Switchboard, LED light & fan services"},
+    {"name": "Naveen Kumar", "service_type": "carpenter", "location": "Guntur", "availability": ["11:00-13:00", "17:00-19:00"], "rating": 4.6, "experience_years": 7, "bio": "Door, cupboard repair & modular fittings"},
+    # Tirupati
+    {"name": "Bhaskar", "service_type": "plumber", "location": "Tirupati", "availability": ["08:00-10:00", "15:00-17:00"], "rating": 4.5, "experience_years": 5, "bio": "Bathroom & kitchen plumbing"},
+    {"name": "Naresh", "service_type": "electrician", "location": "Tirupati", "availability": ["10:00-12:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "Home wiring & fan installation"},
+    {"name": "Sandeep", "service_type": "ac", "location": "Tirupati", "availability": ["09:00-11:00", "14:00-16:00"], "rating": 4.6, "experience_years": 6, "bio": "Split/Window AC install & service"},
+    # Kakinada
+    {"name": "Vamsi", "service_type": "plumber", "location": "Kakinada", "availability": ["10:00-12:00", "16:00-18:00"], "rating": 4.4, "experience_years": 4, "bio": "Blockage clearing & leak fixes"},
+    {"name": "Hemanth", "service_type": "electrician", "location": "Kakinada", "availability": ["09:30-11:30", "17:30-19:30"], "rating": 4.5, "experience_years": 5, "bio": "Switch repair, UPS, geyser wiring"},
+    # Rajahmundry
+    {"name": "Sridhar", "service_type": "plumber", "location": "Rajahmundry", "availability": ["08:00-10:00", "13:00-15:00"], "rating": 4.5, "experience_years": 5, "bio": "Tap replacement & pipeline checks"},
+    {"name": "Maneesh", "service_type": "electrician", "location": "Rajahmundry", "availability": ["11:00-13:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "Switchboard, lighting and fans"},
+    # Nellore
+    {"name": "Venkat", "service_type": "plumber", "location": "Nellore", "availability": ["09:00-11:00", "15:00-17:00"], "rating": 4.5, "experience_years": 5, "bio": "Bathroom fittings & tap leaks"},
+    {"name": "Kishore", "service_type": "electrician", "location": "Nellore", "availability": ["10:00-12:00", "17:00-19:00"], "rating": 4.6, "experience_years": 7, "bio": "Inverter, MCB and wiring"},
+    # Anantapur
+    {"name": "Fayaz", "service_type": "plumber", "location": "Anantapur", "availability": ["08:00-10:00", "14:00-16:00"], "rating": 4.4, "experience_years": 4, "bio": "Sink & pipeline fixes"},
+    {"name": "Harish", "service_type": "electrician", "location": "Anantapur", "availability": ["11:00-13:00", "18:00-20:00"], "rating": 4.5, "experience_years": 5, "bio": "Meter board & earthing"},
+    # Kurnool
+    {"name": "Shiva", "service_type": "plumber", "location": "Kurnool", "availability": ["09:00-11:00", "15:00-17:00"], "rating": 4.5, "experience_years": 5, "bio": "Bathroom repairs & water leaks"},
+    {"name": "Lokesh", "service_type": "electrician", "location": "Kurnool", "availability": ["10:00-12:00", "17:00-19:00"], "rating": 4.6, "experience_years": 7, "bio": "Wiring, fan & LED installs"},
+    # Kadapa
+    {"name": "Arif", "service_type": "plumber", "location": "Kadapa", "availability": ["08:00-10:00", "13:00-15:00"], "rating": 4.4, "experience_years": 4, "bio": "Tap & shower repairs"},
+    {"name": "Mahesh", "service_type": "electrician", "location": "Kadapa", "availability": ["11:00-13:00", "18:00-20:00"], "rating": 4.5, "experience_years": 5, "bio": "Switchboard & home wiring"},
+    # Srikakulam
+    {"name": "Rakesh", "service_type": "plumber", "location": "Srikakulam", "availability": ["09:00-11:00", "16:00-18:00"], "rating": 4.3, "experience_years": 3, "bio": "Leak repairs & drain cleaning"},
+    {"name": "Charan", "service_type": "electrician", "location": "Srikakulam", "availability": ["10:00-12:00", "17:00-19:00"], "rating": 4.5, "experience_years": 5, "bio": "Lighting, fan installation"},
+    # Vizianagaram
+    {"name": "Ajay", "service_type": "plumber", "location": "Vizianagaram", "availability": ["08:30-10:30", "15:30-17:30"], "rating": 4.4, "experience_years": 4, "bio": "Kitchen & bathroom plumbing"},
+    {"name": "Yogesh", "service_type": "electrician", "location": "Vizianagaram", "availability": ["10:00-12:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "Switchboard & inverter wiring"},
+    # Ongole
+    {"name": "Ramu", "service_type": "plumber", "location": "Ongole", "availability": ["09:00-11:00", "14:00-16:00"], "rating": 4.4, "experience_years": 4, "bio": "Sink blockage & tap leaks"},
+    {"name": "Sujith", "service_type": "electrician", "location": "Ongole", "availability": ["11:00-13:00", "17:00-19:00"], "rating": 4.5, "experience_years": 5, "bio": "Fan, LED, wiring"},
+    # Eluru
+    {"name": "Ravi Kumar", "service_type": "plumber", "location": "Eluru", "availability": ["08:00-10:00", "13:00-15:00"], "rating": 4.5, "experience_years": 5, "bio": "Bathroom fittings & leaks"},
+    {"name": "Anil", "service_type": "electrician", "location": "Eluru", "availability": ["10:00-12:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "Short circuit & wiring"},
+    # Machilipatnam
+    {"name": "Gopi", "service_type": "plumber", "location": "Machilipatnam", "availability": ["09:00-11:00", "16:00-18:00"], "rating": 4.3, "experience_years": 3, "bio": "Drain cleaning & taps"},
+    {"name": "Venkatesh", "service_type": "electrician", "location": "Machilipatnam", "availability": ["10:00-12:00", "17:00-19:00"], "rating": 4.5, "experience_years": 5, "bio": "MCB, wiring & fans"},
+    # Chittoor
+    {"name": "Mohan", "service_type": "plumber", "location": "Chittoor", "availability": ["08:00-10:00", "14:00-16:00"], "rating": 4.4, "experience_years": 4, "bio": "Pipelines & taps"},
+    {"name": "Sathish", "service_type": "electrician", "location": "Chittoor", "availability": ["11:00-13:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "Wiring & appliances"},
+    # Hindupur
+    {"name": "Rahim", "service_type": "plumber", "location": "Hindupur", "availability": ["09:00-11:00", "15:00-17:00"], "rating": 4.3, "experience_years": 3, "bio": "Leakage & fittings"},
+    {"name": "Teja", "service_type": "electrician", "location": "Hindupur", "availability": ["10:00-12:00", "17:00-19:00"], "rating": 4.5, "experience_years": 5, "bio": "Lighting, fans, wiring"},
+    # Tenali
+    {"name": "Surya", "service_type": "plumber", "location": "Tenali", "availability": ["08:30-10:30", "16:00-18:00"], "rating": 4.4, "experience_years": 4, "bio": "Bathroom, kitchen plumbing"},
+    {"name": "Rohit", "service_type": "electrician", "location": "Tenali", "availability": ["10:00-12:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "Electrical fittings"},
+    # Bhimavaram
+    {"name": "Prakash", "service_type": "plumber", "location": "Bhimavaram", "availability": ["09:00-11:00", "15:00-17:00"], "rating": 4.4, "experience_years": 4, "bio": "Taps & pipelines"},
+    {"name": "Sunny", "service_type": "electrician", "location": "Bhimavaram", "availability": ["11:00-13:00", "17:00-19:00"], "rating": 4.5, "experience_years": 5, "bio": "Switchboard & wiring"},
+    # Tadepalligudem
+    {"name": "Madhu", "service_type": "plumber", "location": "Tadepalligudem", "availability": ["08:00-10:00", "14:00-16:00"], "rating": 4.4, "experience_years": 4, "bio": "Leak & blockage fixes"},
+    {"name": "Vivek", "service_type": "electrician", "location": "Tadepalligudem", "availability": ["10:00-12:00", "18:00-20:00"], "rating": 4.6, "experience_years": 6, "bio": "Wiring & lights"},
+    # Add some specialized services across AP
+    {"name": "Iqbal", "service_type": "locksmith", "location": "Vijayawada", "availability": ["24x7"], "rating": 4.7, "experience_years": 10, "bio": "Emergency lock opening & key duplication"},
+    {"name": "Anusha", "service_type": "cleaning", "location": "Visakhapatnam", "availability": ["09:00-12:00", "13:00-16:00"], "rating": 4.8, "experience_years": 7, "bio": "Deep home cleaning & kitchen cleaning"},
+    {"name": "Pooja", "service_type": "pest", "location": "Guntur", "availability": ["10:00-13:00", "15:00-18:00"], "rating": 4.6, "experience_years": 6, "bio": "Cockroach, termite & mosquito control"},
+)
+
+
+async def ensure_indexes():
+    if database.db is None:
         return
-    if db["worker"].count_documents({}) == 0:
-        # Andhra Pradesh focused worker set across cities and services
-        ap_workers = [
-            # Visakhapatnam
-            WorkerSchema(name="Srinivas Reddy", service_type="plumber", location="Visakhapatnam", availability=["09:00-11:00", "15:00-17:00"], rating=4.8, experience_years=9, bio="Leak repair, bathroom fitting, water purifier plumbing"),
-            WorkerSchema(name="Kalyan Kumar", service_type="electrician", location="Visakhapatnam", availability=["10:00-12:00", "16:00-18:00"], rating=4.7, experience_years=7, bio="Wiring, MCB, inverter & fan installations"),
-            WorkerSchema(name="Suresh Yadav", service_type="ac", location="Visakhapatnam", availability=["11:00-13:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="AC servicing, gas refill, installation"),
-            # Vijayawada
-            WorkerSchema(name="Ravi Teja", service_type="plumber", location="Vijayawada", availability=["08:00-10:00", "14:00-16:00"], rating=4.5, experience_years=5, bio="Kitchen sink, pipeline & overhead tank solutions"),
-            WorkerSchema(name="Imran Shaik", service_type="electrician", location="Vijayawada", availability=["09:00-11:00", "17:00-19:00"], rating=4.7, experience_years=8, bio="Short-circuit fix, appliance wiring, geyser fix"),
-            WorkerSchema(name="Pradeep Varma", service_type="gas", location="Vijayawada", availability=["12:00-14:00", "19:00-21:00"], rating=4.6, experience_years=6, bio="Gas stove service, pipeline checks, regulator"),
-            # Guntur
-            WorkerSchema(name="Arun K", service_type="plumber", location="Guntur", availability=["10:00-12:00", "16:00-18:00"], rating=4.4, experience_years=4, bio="Shower, tap & flush repairs"),
-            WorkerSchema(name="Rahul Dev", service_type="electrician", location="Guntur", availability=["09:00-11:00", "13:00-15:00"], rating=4.5, experience_years=6, bio="Switchboard, LED light & fan services"),
-            WorkerSchema(name="Naveen Kumar", service_type="carpenter", location="Guntur", availability=["11:00-13:00", "17:00-19:00"], rating=4.6, experience_years=7, bio="Door, cupboard repair & modular fittings"),
-            # Tirupati
-            WorkerSchema(name="Bhaskar", service_type="plumber", location="Tirupati", availability=["08:00-10:00", "15:00-17:00"], rating=4.5, experience_years=5, bio="Bathroom & kitchen plumbing"),
-            WorkerSchema(name="Naresh", service_type="electrician", location="Tirupati", availability=["10:00-12:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="Home wiring & fan installation"),
-            WorkerSchema(name="Sandeep", service_type="ac", location="Tirupati", availability=["09:00-11:00", "14:00-16:00"], rating=4.6, experience_years=6, bio="Split/Window AC install & service"),
-            # Kakinada
-            WorkerSchema(name="Vamsi", service_type="plumber", location="Kakinada", availability=["10:00-12:00", "16:00-18:00"], rating=4.4, experience_years=4, bio="Blockage clearing & leak fixes"), 
-            WorkerSchema(name="Hemanth", service_type="electrician", location="Kakinada", availability=["09:30-11:30", "17:30-19:30"], rating=4.5, experience_years=5, bio="Switch repair, UPS, geyser wiring"),
-            # Rajahmundry
-            WorkerSchema(name="Sridhar", service_type="plumber", location="Rajahmundry", availability=["08:00-10:00", "13:00-15:00"], rating=4.5, experience_years=5, bio="Tap replacement & pipeline checks"),
-            WorkerSchema(name="Maneesh", service_type="electrician", location="Rajahmundry", availability=["11:00-13:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="Switchboard, lighting and fans"),
-            # Nellore
-            WorkerSchema(name="Venkat", service_type="plumber", location="Nellore", availability=["09:00-11:00", "15:00-17:00"], rating=4.5, experience_years=5, bio="Bathroom fittings & tap leaks"),
-            WorkerSchema(name="Kishore", service_type="electrician", location="Nellore", availability=["10:00-12:00", "17:00-19:00"], rating=4.6, experience_years=7, bio="Inverter, MCB and wiring"),
-            # Anantapur
-            WorkerSchema(name="Fayaz", service_type="plumber", location="Anantapur", availability=["08:00-10:00", "14:00-16:00"], rating=4.4, experience_years=4, bio="Sink & pipeline fixes"),
-            WorkerSchema(name="Harish", service_type="electrician", location="Anantapur", availability=["11:00-13:00", "18:00-20:00"], rating=4.5, experience_years=5, bio="Meter board & earthing"),
-            # Kurnool
-            WorkerSchema(name="Shiva", service_type="plumber", location="Kurnool", availability=["09:00-11:00", "15:00-17:00"], rating=4.5, experience_years=5, bio="Bathroom repairs & water leaks"),
-            WorkerSchema(name="Lokesh", service_type="electrician", location="Kurnool", availability=["10:00-12:00", "17:00-19:00"], rating=4.6, experience_years=7, bio="Wiring, fan & LED installs"),
-            # Kadapa
-            WorkerSchema(name="Arif", service_type="plumber", location="Kadapa", availability=["08:00-10:00", "13:00-15:00"], rating=4.4, experience_years=4, bio="Tap & shower repairs"),
-            WorkerSchema(name="Mahesh", service_type="electrician", location="Kadapa", availability=["11:00-13:00", "18:00-20:00"], rating=4.5, experience_years=5, bio="Switchboard & home wiring"),
-            # Srikakulam
-            WorkerSchema(name="Rakesh", service_type="plumber", location="Srikakulam", availability=["09:00-11:00", "16:00-18:00"], rating=4.3, experience_years=3, bio="Leak repairs & drain cleaning"),
-            WorkerSchema(name="Charan", service_type="electrician", location="Srikakulam", availability=["10:00-12:00", "17:00-19:00"], rating=4.5, experience_years=5, bio="Lighting, fan installation"),
-            # Vizianagaram
-            WorkerSchema(name="Ajay", service_type="plumber", location="Vizianagaram", availability=["08:30-10:30", "15:30-17:30"], rating=4.4, experience_years=4, bio="Kitchen & bathroom plumbing"),
-            WorkerSchema(name="Yogesh", service_type="electrician", location="Vizianagaram", availability=["10:00-12:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="Switchboard & inverter wiring"),
-            # Ongole
-            WorkerSchema(name="Ramu", service_type="plumber", location="Ongole", availability=["09:00-11:00", "14:00-16:00"], rating=4.4, experience_years=4, bio="Sink blockage & tap leaks"),
-            WorkerSchema(name="Sujith", service_type="electrician", location="Ongole", availability=["11:00-13:00", "17:00-19:00"], rating=4.5, experience_years=5, bio="Fan, LED, wiring"),
-            # Eluru
-            WorkerSchema(name="Ravi Kumar", service_type="plumber", location="Eluru", availability=["08:00-10:00", "13:00-15:00"], rating=4.5, experience_years=5, bio="Bathroom fittings & leaks"),
-            WorkerSchema(name="Anil", service_type="electrician", location="Eluru", availability=["10:00-12:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="Short circuit & wiring"),
-            # Machilipatnam
-            WorkerSchema(name="Gopi", service_type="plumber", location="Machilipatnam", availability=["09:00-11:00", "16:00-18:00"], rating=4.3, experience_years=3, bio="Drain cleaning & taps"),
-            WorkerSchema(name="Venkatesh", service_type="electrician", location="Machilipatnam", availability=["10:00-12:00", "17:00-19:00"], rating=4.5, experience_years=5, bio="MCB, wiring & fans"),
-            # Chittoor
-            WorkerSchema(name="Mohan", service_type="plumber", location="Chittoor", availability=["08:00-10:00", "14:00-16:00"], rating=4.4, experience_years=4, bio="Pipelines & taps"),
-            WorkerSchema(name="Sathish", service_type="electrician", location="Chittoor", availability=["11:00-13:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="Wiring & appliances"),
-            # Hindupur
-            WorkerSchema(name="Rahim", service_type="plumber", location="Hindupur", availability=["09:00-11:00", "15:00-17:00"], rating=4.3, experience_years=3, bio="Leakage & fittings"),
-            WorkerSchema(name="Teja", service_type="electrician", location="Hindupur", availability=["10:00-12:00", "17:00-19:00"], rating=4.5, experience_years=5, bio="Lighting, fans, wiring"),
-            # Tenali
-            WorkerSchema(name="Surya", service_type="plumber", location="Tenali", availability=["08:30-10:30", "16:00-18:00"], rating=4.4, experience_years=4, bio="Bathroom, kitchen plumbing"),
-            WorkerSchema(name="Rohit", service_type="electrician", location="Tenali", availability=["10:00-12:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="Electrical fittings"),
-            # Bhimavaram
-            WorkerSchema(name="Prakash", service_type="plumber", location="Bhimavaram", availability=["09:00-11:00", "15:00-17:00"], rating=4.4, experience_years=4, bio="Taps & pipelines"),
-            WorkerSchema(name="Sunny", service_type="electrician", location="Bhimavaram", availability=["11:00-13:00", "17:00-19:00"], rating=4.5, experience_years=5, bio="Switchboard & wiring"),
-            # Tadepalligudem
-            WorkerSchema(name="Madhu", service_type="plumber", location="Tadepalligudem", availability=["08:00-10:00", "14:00-16:00"], rating=4.4, experience_years=4, bio="Leak & blockage fixes"),
-            WorkerSchema(name="Vivek", service_type="electrician", location="Tadepalligudem", availability=["10:00-12:00", "18:00-20:00"], rating=4.6, experience_years=6, bio="Wiring & lights"),
-            # Add some specialized services across AP
-            WorkerSchema(name="Iqbal", service_type="locksmith", location="Vijayawada", availability=["24x7"], rating=4.7, experience_years=10, bio="Emergency lock opening & key duplication"),
-            WorkerSchema(name="Anusha", service_type="cleaning", location="Visakhapatnam", availability=["09:00-12:00", "13:00-16:00"], rating=4.8, experience_years=7, bio="Deep home cleaning & kitchen cleaning"),
-            WorkerSchema(name="Pooja", service_type="pest", location="Guntur", availability=["10:00-13:00", "15:00-18:00"], rating=4.6, experience_years=6, bio="Cockroach, termite & mosquito control"),
-        ]
-        for w in ap_workers:
-            create_document("worker", w)
+    await asyncio.gather(
+        database.db["user"].create_index("email", unique=True),
+        database.db["worker"].create_index([("service_type", 1), ("location_lc", 1)]),
+        database.db["worker"].create_index("location_lc"),
+        database.db["booking"].create_index([("user_id", 1), ("created_at", -1)]),
+        # Backfill workers written before location_lc existed
+        database.db["worker"].update_many(
+            {"location_lc": {"$exists": False}},
+            [{"$set": {"location_lc": {"$toLower": "$location"}}}],
+        ),
+    )
+
+
+async def seed_workers_if_empty():
+    if database.db is None:
+        return
+    if await database.db["worker"].count_documents({}, limit=1) == 0:
+        # Every uvicorn worker runs this at once on an empty DB. Upserting on a uniquely
+        # indexed seed_key makes the seed idempotent, so racing workers can't duplicate it.
+        await database.db["worker"].create_index(
+            "seed_key", unique=True, partialFilterExpression={"seed_key": {"$exists": True}}
+        )
+        now = utc_now()
+        await database.db["worker"].bulk_write(
+            [
+                UpdateOne(
+                    {"seed_key": f'{w["name"]}|{w["location"]}'},
+                    {"$setOnInsert": {**w, "location_lc": w["location"].lower(), "created_at": now, "updated_at": now}},
+                    upsert=True,
+                )
+                for w in AP_WORKER_SEED
+            ],
+            ordered=False,
+        )
 
 
 # --------- Basic ---------
@@ -137,7 +295,7 @@ def read_root():
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -147,13 +305,13 @@ def test_database():
         "collections": [],
     }
     try:
-        if db is not None:
+        if database.db is not None:
             response["database"] = "✅ Connected & Working"
             response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
             response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await database.db.list_collection_names()
                 response["collections"] = collections[:10]
             except Exception as e:
                 response["database"] = f"⚠️ Connected but Error: {str(e)[:50]}"
@@ -164,119 +322,185 @@ def test_database():
 
 # --------- Auth Endpoints ---------
 @app.post("/auth/register")
-def register(payload: RegisterRequest):
-    if db is None:
+async def register(payload: RegisterRequest):
+    if database.db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    existing = db["user"].find_one({"email": payload.email})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    user_doc = UserSchema(
+    user_doc = UserSchema.model_construct(
         name=payload.name,
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await run_in_hash_pool(hash_password, payload.password),
         phone=payload.phone,
         address=payload.address,
         is_active=True,
     )
-    user_id = create_document("user", user_doc)
-    user = db["user"].find_one({"_id": ObjectId(user_id)})
-    return to_public_id(user)
+    # The unique index on email rejects duplicates, so there is no pre-check round trip
+    try:
+        user = await create_document("user", user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    del user["password_hash"]
+    return MongoJSONResponse(to_public_id(user))
 
 
 @app.post("/auth/login")
-def login(payload: LoginRequest):
-    if db is None:
+async def login(payload: LoginRequest):
+    if database.db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    user = db["user"].find_one({"email": payload.email})
+    user = await database.db["user"].find_one({"email": payload.email})
     if not user:
+        # Spend the same Argon2 time as a real check so response timing doesn't reveal
+        # which emails are registered
+        await run_in_hash_pool(verify_password, app.state.dummy_password_hash, payload.password)
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if user.get("password_hash") != hash_password(payload.password):
+    stored = user.get("password_hash", "")
+    if not await run_in_hash_pool(verify_password, stored, payload.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    return to_public_id(user)
+    if needs_rehash(stored):
+        # Upgrade legacy SHA-256 (or outdated Argon2 parameters) once, on the next good login
+        new_hash = await run_in_hash_pool(hash_password, payload.password)
+        await database.db["user"].update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
+    del user["password_hash"]
+    user = to_public_id(user)
+    user["token"] = issue_session(user["id"])
+    return MongoJSONResponse(user)
+
+
+@app.get("/auth/me")
+async def me(authorization: Annotated[Optional[str], Header()] = None):
+    if database.db is None:
+        raise HTTPException(status_code=500, detail="Database not available")
+    scheme, _, token = (authorization or "").partition(" ")
+    user_id = verify_session(token) if scheme.lower() == "bearer" and token else None
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid session")
+    user = await database.db["user"].find_one({"_id": user_id}, {"password_hash": 0})
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid session")
+    return MongoJSONResponse(to_public_id(user))
 
 
 # --------- Workers ---------
+# (serialized body, ETag) of /workers responses keyed by (service_type, location, include_bio).
+# Per process: create_worker only clears the cache of the worker that handled it, so other
+# uvicorn workers can serve the old list until their entry expires (at most ttl seconds).
+WORKER_CACHE = TTLCache(maxsize=512, ttl=60)
+
+
 @app.get("/workers")
-def list_workers(service_type: Optional[str] = None, location: Optional[str] = None):
-    if db is None:
+async def list_workers(
+    service_type: Annotated[Optional[ServiceType], Query()] = None,
+    location: Annotated[Optional[str], Query()] = None,
+    include_bio: Annotated[bool, Query()] = True,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    if database.db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    query = {}
-    if service_type:
-        query["service_type"] = service_type
-    if location:
-        query["location"] = {"$regex": location, "$options": "i"}
-    workers = list(db["worker"].find(query).limit(200))
-    return [to_public_id(w) for w in workers]
+    location = location.lower() if location else ""
+    key = (service_type or "", location, include_bio)
+    cached = WORKER_CACHE.get(key)
+    if cached is None:
+        query = {}
+        if service_type:
+            query["service_type"] = service_type.value
+        if location:
+            # Case-sensitive prefix match on the lowercased copy stays on the index
+            query["location_lc"] = {"$regex": f"^{re.escape(location)}"}
+        projection = {"location_lc": 0, "seed_key": 0}
+        if not include_bio:
+            projection["bio"] = 0
+        cursor = database.db["worker"].find(query, projection).limit(200)
+        body = orjson.dumps([to_public_id(w) async for w in cursor], default=orjson_default)
+        # Weak: GZipMiddleware may re-encode the body, and strong tags must differ per coding
+        cached = WORKER_CACHE[key] = (body, f'W/"{hashlib.sha256(body).hexdigest()[:32]}"')
+    body, etag = cached
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 class CreateWorkerRequest(BaseModel):
     name: str
-    service_type: str
+    service_type: ServiceType
     location: str
     availability: List[str] = []
-    rating: float = 4.5
-    experience_years: int = 1
+    # Same bounds as WorkerSchema, which create_worker builds without re-validating
+    rating: float = Field(4.5, ge=0, le=5)
+    experience_years: int = Field(1, ge=0)
     bio: Optional[str] = None
 
 
 @app.post("/workers")
-def create_worker(payload: CreateWorkerRequest):
-    if db is None:
+async def create_worker(payload: CreateWorkerRequest):
+    if database.db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    worker_doc = WorkerSchema(**payload.model_dump())
-    worker_id = create_document("worker", worker_doc)
-    worker = db["worker"].find_one({"_id": ObjectId(worker_id)})
-    return to_public_id(worker)
+    worker_doc = WorkerSchema.model_construct(**payload.model_dump())
+    doc = worker_doc.model_dump()
+    doc["location_lc"] = doc["location"].lower()
+    worker = await create_document("worker", doc)
+    WORKER_CACHE.clear()
+    del worker["location_lc"]
+    return MongoJSONResponse(to_public_id(worker))
 
 
 # --------- Bookings ---------
 class CreateBookingRequest(BaseModel):
     user_id: str
     worker_id: str
-    service_date: str  # ISO date string
+    service_date: date
     time_slot: str
     address: str
 
 
 @app.post("/bookings")
-def create_booking(payload: CreateBookingRequest):
-    if db is None:
+async def create_booking(payload: CreateBookingRequest):
+    if database.db is None:
         raise HTTPException(status_code=500, detail="Database not available")
     # Validate references
-    try:
-        user = db["user"].find_one({"_id": ObjectId(payload.user_id)})
-        worker = db["worker"].find_one({"_id": ObjectId(payload.worker_id)})
-    except Exception:
+    if not (ObjectId.is_valid(payload.user_id) and ObjectId.is_valid(payload.worker_id)):
         raise HTTPException(status_code=400, detail="Invalid user_id or worker_id")
+    user_oid, worker_oid = ObjectId(payload.user_id), ObjectId(payload.worker_id)
+    user, worker = await asyncio.gather(
+        database.db["user"].find_one({"_id": user_oid}, {"_id": 1}),
+        database.db["worker"].find_one({"_id": worker_oid}, {"_id": 1}),
+    )
     if not user or not worker:
         raise HTTPException(status_code=404, detail="User or Worker not found")
 
-    booking_doc = BookingSchema(
+    booking_doc = BookingSchema.model_construct(
         user_id=payload.user_id,
         worker_id=payload.worker_id,
-        service_date=datetime.fromisoformat(payload.service_date).date(),
+        service_date=payload.service_date,
         time_slot=payload.time_slot,
         address=payload.address,
-        status="pending",
+        status=BookingStatus.pending,
     )
-    booking_id = create_document("booking", booking_doc)
-    booking = db["booking"].find_one({"_id": ObjectId(booking_id)})
-    return to_public_id(booking)
+    # BSON has no date-only type, so store service_date as its ISO string
+    booking = await create_document("booking", booking_doc.model_dump(mode="json"))
+    return MongoJSONResponse(to_public_id(booking))
 
 
 @app.get("/bookings")
-def list_bookings(user_id: Optional[str] = None):
-    if db is None:
+async def list_bookings(user_id: Optional[str] = None):
+    if database.db is None:
         raise HTTPException(status_code=500, detail="Database not available")
     query = {}
     if user_id:
         query["user_id"] = user_id
-    bookings = list(db["booking"].find(query).sort("created_at", -1).limit(100))
-    return [to_public_id(b) for b in bookings]
+    cursor = database.db["booking"].find(query).sort("created_at", -1).limit(100)
+    return MongoJSONResponse([to_public_id(b) async for b in cursor])
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Workers inherit the environment, so this also sizes their hash pools
+    os.environ.setdefault("WEB_CONCURRENCY", str(os.cpu_count() or 1))
+    # Each worker process runs its own lifespan, so each gets its own Motor client and pool
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.environ["WEB_CONCURRENCY"]),
+        loop="uvloop",
+        http="httptools",
+    )
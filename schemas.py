@@ -5,9 +5,30 @@ Each Pydantic model represents a collection in your MongoDB database.
 Collection name is the lowercase of the class name (e.g., User -> "user").
 """
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import Optional, List
 from datetime import date
+from enum import Enum
+
+
+class ServiceType(str, Enum):
+    """Services a worker can offer"""
+    plumber = "plumber"
+    electrician = "electrician"
+    ac = "ac"
+    gas = "gas"
+    carpenter = "carpenter"
+    locksmith = "locksmith"
+    cleaning = "cleaning"
+    pest = "pest"
+
+
+class BookingStatus(str, Enum):
+    """Lifecycle states of a booking"""
+    pending = "pending"
+    confirmed = "confirmed"
+    completed = "completed"
+    cancelled = "cancelled"
 
 
 class User(BaseModel):
@@ -22,8 +43,10 @@ class User(BaseModel):
 
 class Worker(BaseModel):
     """Workers (Service providers) collection schema"""
+    model_config = ConfigDict(use_enum_values=True)
+
     name: str = Field(..., description="Worker full name")
-    service_type: str = Field(..., description="Type of service e.g., plumber, electrician, gas")
+    service_type: ServiceType = Field(..., description="Type of service e.g., plumber, electrician, gas")
     location: str = Field(..., description="City/Area of service")
     availability: List[str] = Field(default_factory=list, description="Available time slots, e.g., ['09:00-11:00']")
     rating: float = Field(4.5, ge=0, le=5, description="Average rating")
@@ -33,9 +56,11 @@ class Worker(BaseModel):
 
 class Booking(BaseModel):
     """Bookings collection schema"""
+    model_config = ConfigDict(use_enum_values=True)
+
     user_id: str = Field(..., description="ID of the user booking the service")
     worker_id: str = Field(..., description="ID of the worker to be booked")
     service_date: date = Field(..., description="Date of service")
     time_slot: str = Field(..., description="Chosen time slot")
     address: str = Field(..., description="Service address")
-    status: str = Field("pending", description="Booking status: pending, confirmed, completed, cancelled")
+    status: BookingStatus = Field(BookingStatus.pending, description="Booking status: pending, confirmed, completed, cancelled")